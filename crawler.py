@@ -6,20 +6,27 @@ crawler.py - 教育部网站三模块全量爬虫
   2. 教育部文件（动态分页）
   3. 其他部门文件（静态分页）
   
-支持断点续爬、日期命名、错误重试。
+支持断点续爬、日期命名、错误重试，详情页基于 asyncio + aiohttp 并发下载。
 """
 
 import os
-import re
+import atexit
 import sys
-import json
 import time
 import random
 import logging
+import sqlite3
+import threading
+import zlib
+import asyncio
 import argparse
-import requests
-from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+import charset_normalizer
+import orjson
+from urllib.parse import urljoin, urlsplit
+from list_parser import make_filename, get_total_pages, extract_items
 
 # ================================================================
 # 配置
@@ -27,6 +34,8 @@ from bs4 import BeautifulSoup
 BASE_DATA_DIR = "data"
 LOG_DIR = "logs"
 MANIFEST_FILE = os.path.join(BASE_DATA_DIR, "manifest.jsonl")
+STATE_DB = os.path.join(BASE_DATA_DIR, "state.db")
+CHECKPOINT_DIR = os.path.join(BASE_DATA_DIR, "checkpoints")
 
 SOURCES = [
     {
@@ -58,11 +67,48 @@ HEADERS = {
     ),
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    # 不手动设置 Accept-Encoding：aiohttp 默认发送 gzip, deflate，
+    # 只有能导入 Brotli 时才追加 br，避免服务器返回无法解码的 br 响应
 }
 
 MAX_RETRIES = 3
-DELAY_MIN = 2.0
-DELAY_MAX = 5.0
+
+# 异步请求按主机限速（令牌桶）：稳态每秒请求数 / 突发上限
+RATE_LIMIT = 4.0
+RATE_BURST = 8
+# 自适应限速：响应耗时（首字节，指数滑动平均）超过 LATENCY_TARGET 秒时按比例降速，最低 RATE_MIN
+LATENCY_TARGET = 0.5
+LATENCY_ALPHA = 0.2
+RATE_MIN = 1 / 3
+
+# 详情页并发下载数 / 连接池上限 / 超时（秒）
+CONCURRENCY = 8
+CONNECTION_LIMIT = 64
+REQUEST_TIMEOUT = 30
+
+# 列表页并发数 / 每批抓取的页数（批内全部抓完才开始解析与下载）
+LIST_CONCURRENCY = 4
+LIST_BATCH = 50
+
+# 动态搜索页中相对链接的 urljoin 基准
+DYNAMIC_JOIN_BASE = "http://www.moe.gov.cn/"
+
+# 增量模式：动态栏目连续多少整页全部为旧文件时才停止 / 每次并发抓取的列表页数
+FULL_PAGE_SKIP_LIMIT = 3
+INCREMENTAL_WINDOW = 5
+
+# manifest 每攒多少条记录写盘一次
+MANIFEST_FLUSH_RECORDS = 1000
+
+# 全量模式断点续爬时回退的页数（期间新发布的文件会把旧条目往后挤）
+CHECKPOINT_REWIND = 2
+
+# 详情页 gzip 压缩级别（HTML 压缩比约 5~8 倍）
+GZIP_LEVEL = 6
+# 详情页流式写盘的分块大小（字节）
+STREAM_CHUNK_SIZE = 1 << 16
+# 详情页压缩与写盘的线程数（zlib 压缩时释放 GIL，可与事件循环并行）
+DISK_WORKERS = CONCURRENCY
 
 # ================================================================
 # 日志
@@ -78,421 +124,584 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-
 # ================================================================
 # 工具函数
 # ================================================================
-def sanitize_filename(name: str, max_len: int = 80) -> str:
-    """清洗文件名：移除非法字符，截断过长名称"""
-    # 移除 Windows / macOS 非法字符
-    name = re.sub(r'[\\/:*?"<>|]', '', name)
-    # 移除控制字符和多余空格
-    name = re.sub(r'\s+', ' ', name).strip()
-    # 移除首尾的点号（Windows 限制）
-    name = name.strip('.')
-    if len(name) > max_len:
-        name = name[:max_len].rstrip()
-    return name if name else "untitled"
+def decode_html(body: bytes) -> str:
+    """按 UTF-8 解码页面；仅在 UTF-8 解码失败时才调用 charset_normalizer 探测编码"""
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        best = charset_normalizer.from_bytes(body).best()
+        return str(best) if best else body.decode("utf-8", errors="replace")
+
 
+async def polite_sleep_async(min_s: float, max_s: float):
+    """随机延迟（重试前退避），不阻塞事件循环"""
+    await asyncio.sleep(random.uniform(min_s, max_s))
 
-def make_filename(date_str: str, title: str) -> str:
-    """用日期+标题生成文件名"""
-    safe_title = sanitize_filename(title)
-    return f"{date_str}_{safe_title}.html"
 
+class TokenBucket:
+    """
+    令牌桶限速器：稳态每秒 rate 个请求，最多允许 burst 个突发请求。
+    比每次请求前随机 sleep 更平滑，也不会在服务器空闲时白白等待。
+    速率随 observe() 报告的响应耗时在 [min_rate, max_rate] 之间自适应。
+    """
 
-def polite_sleep(min_s: float = DELAY_MIN, max_s: float = DELAY_MAX):
-    """随机延迟，避免对服务器造成压力"""
-    t = random.uniform(min_s, max_s)
-    time.sleep(t)
+    def __init__(self, rate: float, burst: int, min_rate: float = RATE_MIN):
+        self.rate = rate
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.latency: float | None = None  # 响应耗时的指数滑动平均（秒）
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def observe(self, latency: float):
+        """记录一次响应耗时：服务器变慢时按比例降速，恢复后回到 max_rate"""
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_ALPHA * (latency - self.latency)
+        avg = self.latency
+        if avg <= LATENCY_TARGET:
+            self.rate = self.max_rate
+        else:
+            self.rate = max(self.min_rate, self.max_rate * LATENCY_TARGET / avg)
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_HOST_LIMITERS: dict[str, TokenBucket] = {}
+
+
+def host_limiter(url: str) -> TokenBucket:
+    """返回 URL 所在主机的限速器（同一主机的所有异步请求共享）"""
+    host = urlsplit(url).hostname or ""
+    if host not in _HOST_LIMITERS:
+        _HOST_LIMITERS[host] = TokenBucket(RATE_LIMIT, RATE_BURST)
+    return _HOST_LIMITERS[host]
+
+
+def new_session() -> aiohttp.ClientSession:
+    """创建共享连接池的 aiohttp 会话"""
+    connector = aiohttp.TCPConnector(limit=CONNECTION_LIMIT, limit_per_host=CONCURRENCY)
+    return aiohttp.ClientSession(
+        headers=HEADERS,
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        auto_decompress=True,
+    )
 
 
-def fetch_with_retry(url: str, params: dict = None, retries: int = MAX_RETRIES) -> requests.Response | None:
-    """带重试的 HTTP GET"""
+async def _get_with_retry_async(session: aiohttp.ClientSession, url: str, params: dict | None,
+                                retries: int, on_ok):
+    """带重试的异步 HTTP GET；状态码为 200 时返回 await on_ok(resp) 的结果，失败返回 None"""
+    limiter = host_limiter(url)
     for attempt in range(1, retries + 1):
+        await limiter.acquire()
+        started = time.monotonic()
+        latency = None  # 本次尝试的耗时，每次尝试只向限速器报告一次
         try:
-            resp = requests.get(url, params=params, headers=HEADERS, timeout=30)
-            resp.encoding = resp.apparent_encoding or "utf-8"
-            if resp.status_code == 200:
-                return resp
-            logger.warning(f"HTTP {resp.status_code} for {url} (attempt {attempt}/{retries})")
+            async with session.get(url, params=params) as resp:
+                latency = time.monotonic() - started
+                if resp.status == 200:
+                    return await on_ok(resp)
+                logger.warning(f"HTTP {resp.status} for {url} (attempt {attempt}/{retries})")
+        except asyncio.TimeoutError:
+            # 超时（含读取响应体时超时）按实际等待时间计入，促使限速器降速
+            latency = time.monotonic() - started
+            logger.warning(f"Request timed out for {url} (attempt {attempt}/{retries})")
         except Exception as e:
             logger.warning(f"Request failed for {url}: {e} (attempt {attempt}/{retries})")
+        finally:
+            if latency is not None:
+                limiter.observe(latency)
         if attempt < retries:
-            polite_sleep(3, 8)
+            await polite_sleep_async(3, 8)
     logger.error(f"All {retries} retries failed for {url}")
     return None
 
 
-# ================================================================
-# 列表页解析
-# ================================================================
-def _extract_pages_from_js(html: str) -> int | None:
-    """从页面 JavaScript 变量中提取总页数。
-    MOE 页面在 <script> 中有: var recordCount = 222; var pageSize = 20;
-    """
-    m_count = re.search(r'var\s+recordCount\s*=\s*(\d+)', html)
-    m_size = re.search(r'var\s+pageSize\s*=\s*(\d+)', html)
-    if m_count and m_size:
-        record_count = int(m_count.group(1))
-        page_size = int(m_size.group(1))
-        if page_size > 0:
-            import math
-            return math.ceil(record_count / page_size)
-    return None
-
-
-def get_total_pages_static(html: str) -> int:
-    """从静态列表页提取总页数。优先解析 JS 变量。"""
-    # 方法1：从 JS 变量解析 (最可靠)
-    js_pages = _extract_pages_from_js(html)
-    if js_pages:
-        return js_pages
-
-    # 方法2：从渲染后的 HTML 文本 (有些页面可能服务端渲染)
-    soup = BeautifulSoup(html, "html.parser")
-    page_info = soup.find(string=re.compile(r'页数：\d+/\d+'))
-    if page_info:
-        m = re.search(r'页数：\d+/(\d+)', page_info)
-        if m:
-            return int(m.group(1))
-
-    # 方法3：查找 "末页" 链接
-    last_link = soup.find('a', string=re.compile(r'末页'))
-    if last_link and last_link.get('href'):
-        m = re.search(r'index_(\d+)\.html', last_link['href'])
-        if m:
-            return int(m.group(1)) + 1
-    return 1
-
-
-def get_total_pages_dynamic(html: str) -> int:
-    """从动态搜索页提取总页数。优先解析 JS 变量。"""
-    # 方法1：从 JS 变量
-    js_pages = _extract_pages_from_js(html)
-    if js_pages:
-        return js_pages
-
-    # 方法2：HTML 文本
-    soup = BeautifulSoup(html, "html.parser")
-    page_info = soup.find(string=re.compile(r'页数：\d+/\d+'))
-    if page_info:
-        m = re.search(r'页数：\d+/(\d+)', page_info)
-        if m:
-            return int(m.group(1))
-
-    # 方法3："末页" 链接
-    last_link = soup.find('a', string=re.compile(r'末页'))
-    if last_link and last_link.get('href'):
-        m = re.search(r'page=(\d+)', last_link['href'])
-        if m:
-            return int(m.group(1))
-    return 1
-
-
-def extract_items_from_static(html: str, base_url: str) -> list[dict]:
-    """从静态列表页提取文档条目 [{url, title, date}]"""
-    soup = BeautifulSoup(html, "html.parser")
-    items = []
-
-    # 静态页面的列表通常在 <ul> 里面，每个 <li> 包含 <a> 和 <span>(日期)
-    for li in soup.select("li"):
-        a = li.find("a")
-        if not a:
-            continue
-        href = a.get("href", "")
-        if not href or href.startswith("javascript") or not href.endswith((".html", ".htm")):
-            continue
+async def fetch_with_retry_async(session: aiohttp.ClientSession, url: str, params: dict | None = None,
+                                 retries: int = MAX_RETRIES) -> str | None:
+    """带重试的异步 HTTP GET，成功时返回页面文本"""
+    async def read_text(resp: aiohttp.ClientResponse) -> str:
+        return decode_html(await resp.read())
 
-        # 获取完整标题 — 优先用 title 属性
-        title = a.get("title", "") or a.get_text(strip=True)
-        if not title:
-            continue
+    return await _get_with_retry_async(session, url, params, retries, read_text)
 
-        # 过滤掉网站底部的 "网站声明"、"网站地图"等
-        if title in ("网站声明", "网站地图", "联系我们"):
-            continue
 
-        full_url = urljoin(base_url, href)
-
-        # 提取日期 — 通常在 <span> 中
-        date_str = ""
-        span = li.find("span")
-        if span:
-            date_text = span.get_text(strip=True)
-            m = re.search(r'(\d{4}-\d{2}-\d{2})', date_text)
-            if m:
-                date_str = m.group(1)
-
-        # 如果 span 没找到日期，尝试从 li 的文本中搜索
-        if not date_str:
-            li_text = li.get_text()
-            m = re.search(r'(\d{4}-\d{2}-\d{2})', li_text)
-            if m:
-                date_str = m.group(1)
-
-        # 如果还没有日期，尝试从 URL 中提取
-        if not date_str:
-            m = re.search(r'/(\d{4})(\d{2})/', full_url)
-            if m:
-                date_str = f"{m.group(1)}-{m.group(2)}-00"
-
-        items.append({
-            "url": full_url,
-            "title": title,
-            "date": date_str or "unknown-date",
-        })
-
-    return items
-
-
-def extract_items_from_dynamic(html: str, base_url: str) -> list[dict]:
-    """从动态搜索页提取文档条目"""
-    soup = BeautifulSoup(html, "html.parser")
-    items = []
-
-    for li in soup.select("li"):
-        a = li.find("a")
-        if not a:
-            continue
-        href = a.get("href", "")
-        if not href or href.startswith("javascript") or not href.endswith((".html", ".htm")):
-            continue
+# 整个爬取过程共享的写盘线程池，避免压缩/写文件阻塞事件循环
+_DISK_POOL = ThreadPoolExecutor(max_workers=DISK_WORKERS, thread_name_prefix="disk")
 
-        title = a.get("title", "") or a.get_text(strip=True)
-        if not title:
-            continue
 
-        if title in ("网站声明", "网站地图", "联系我们"):
-            continue
+def _compress_write(compressor, f, chunk: bytes):
+    f.write(compressor.compress(chunk))
 
-        full_url = urljoin(base_url, href)
 
-        # 动态页日期通常紧挨着 <a> 后面
-        date_str = ""
-        # 方法1：<span> 日期
-        span = li.find("span")
-        if span:
-            date_text = span.get_text(strip=True)
-            m = re.search(r'(\d{4}-\d{2}-\d{2})', date_text)
-            if m:
-                date_str = m.group(1)
+def _finish_gzip(compressor, f, tmp_path: str, filepath: str):
+    f.write(compressor.flush())
+    f.close()
+    os.replace(tmp_path, filepath)
 
-        # 方法2：li 全文搜索
-        if not date_str:
-            li_text = li.get_text()
-            m = re.search(r'(\d{4}-\d{2}-\d{2})', li_text)
-            if m:
-                date_str = m.group(1)
 
-        # 方法3：URL 中的日期
-        if not date_str:
-            m = re.search(r'/(\d{4})(\d{2})/', full_url)
-            if m:
-                date_str = f"{m.group(1)}-{m.group(2)}-00"
+async def fetch_to_file_async(session: aiohttp.ClientSession, url: str, filepath: str,
+                              retries: int = MAX_RETRIES) -> bool:
+    """
+    把响应体分块流式写入 gzip 文件，不在内存中缓存整页。
+    先写入 .part 临时文件，完成后再改名，中断时不会留下残缺文件。
+    压缩与写盘在 _DISK_POOL 中执行，事件循环只负责网络 IO。
+    """
+    tmp_path = filepath + ".part"
 
-        items.append({
-            "url": full_url,
-            "title": title,
-            "date": date_str or "unknown-date",
-        })
+    async def save(resp: aiohttp.ClientResponse) -> bool:
+        loop = asyncio.get_running_loop()
+        # wbits=31：输出带 gzip 文件头，与 gzip.open 兼容
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        f = await loop.run_in_executor(_DISK_POOL, open, tmp_path, "wb")
+        try:
+            async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                await loop.run_in_executor(_DISK_POOL, _compress_write, compressor, f, chunk)
+            await loop.run_in_executor(_DISK_POOL, _finish_gzip, compressor, f, tmp_path, filepath)
+        finally:
+            f.close()
+        return True
 
-    return items
+    ok = await _get_with_retry_async(session, url, None, retries, save)
+    if not ok and os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return bool(ok)
 
 
 # ================================================================
 # Manifest 记录
 # ================================================================
-def load_existing_manifest() -> set:
-    """加载已爬取的 URL 集合（用于断点续爬）"""
+class Seen:
+    """
+    已爬取 URL 集合，持久化在 SQLite (state.db) 中。
+    提供与 set 相同的 `in` / add / len 接口，启动时无需重新扫描 manifest。
+    add 只插入不提交（同一连接内立即可见），由 ManifestWriter 在对应 manifest 行落盘后 commit，
+    进程被杀时两者一起丢失，下次运行会按“文件已存在”补记。
+    """
+
+    def __init__(self, path: str = STATE_DB):
+        self.conn = sqlite3.connect(path)
+        # WAL + NORMAL：每次提交时不必整库 fsync
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS seen(url TEXT PRIMARY KEY)")
+        self.conn.commit()
+
+    def __contains__(self, url: object) -> bool:
+        return self.conn.execute("SELECT 1 FROM seen WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def add(self, url: str):
+        self.conn.execute("INSERT OR IGNORE INTO seen(url) VALUES (?)", (url,))
+
+    def commit(self):
+        self.conn.commit()
+
+    def update(self, urls):
+        self.conn.executemany("INSERT OR IGNORE INTO seen(url) VALUES (?)", ((u,) for u in urls))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def _scan_manifest_urls() -> set:
+    """扫描 manifest.jsonl，返回其中的全部 URL"""
     urls = set()
     if os.path.exists(MANIFEST_FILE):
-        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+        # 以二进制逐行读取，orjson 直接解析 bytes，省去解码与 strip 的中间字符串
+        with open(MANIFEST_FILE, "rb") as f:
             for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        record = json.loads(line)
-                        urls.add(record.get("url", ""))
-                    except json.JSONDecodeError:
-                        pass
+                if line.isspace():
+                    continue
+                try:
+                    urls.add(orjson.loads(line).get("url", ""))
+                except orjson.JSONDecodeError:
+                    pass
     return urls
 
 
-def append_manifest(record: dict):
-    """追加一条 manifest 记录"""
-    with open(MANIFEST_FILE, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+def load_existing_manifest() -> Seen:
+    """加载已爬取的 URL 集合（用于断点续爬）"""
+    seen = Seen()
+    # 首次使用 state.db 时，从已有的 manifest 导入历史记录
+    if not len(seen):
+        seen.update(_scan_manifest_urls())
+    return seen
 
 
-# ================================================================
-# 详情页抓取与保存
-# ================================================================
-def download_detail(item: dict, save_dir: str, existing_urls: set, source_name: str) -> bool:
+class ManifestWriter:
     """
-    下载单篇文档的详情页。
-    返回 True 表示新下载，False 表示跳过。
+    manifest.jsonl 的批量追加写入器。
+    记录先序列化到内存列表，攒满 flush_every 条后拼接为一次 write 落盘；
+    进程退出时自动写出剩余记录。记录对应的 Seen 在这些行写入文件后才提交，
+    保证 state.db 中的 URL 都已有 manifest 记录。
     """
-    url = item["url"]
-    if url in existing_urls:
-        return False
 
-    filename = make_filename(item["date"], item["title"])
-    filepath = os.path.join(save_dir, filename)
+    def __init__(self, path: str = MANIFEST_FILE, flush_every: int = MANIFEST_FLUSH_RECORDS):
+        self.path = path
+        self.flush_every = flush_every
+        self._buf: list[bytes] = []
+        self._lock = threading.Lock()
+        self._fh = None
+        self._pending_seen: list[Seen] = []  # 有未提交 URL 的 Seen
+        atexit.register(self.close)
+
+    def append(self, record: dict, seen: Seen):
+        """追加一条记录，并把其 URL 加入 seen（随本批记录一起提交）"""
+        line = orjson.dumps(record) + b"\n"
+        with self._lock:
+            self._buf.append(line)
+            seen.add(record["url"])
+            if seen not in self._pending_seen:
+                self._pending_seen.append(seen)
+            if len(self._buf) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def _flush_locked(self):
+        if not self._buf:
+            return
+        if self._fh is None:
+            self._fh = open(self.path, "ab")
+        self._fh.write(b"".join(self._buf))
+        self._fh.flush()
+        self._buf.clear()
+        for seen in self._pending_seen:
+            seen.commit()
+        self._pending_seen.clear()
+
+
+MANIFEST = ManifestWriter()
 
-    # 如果文件已存在（断点续爬 — 文件存在但 manifest 丢失的情况）
-    if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-        # 补充 manifest
-        append_manifest({
-            "url": url,
-            "title": item["title"],
-            "date": item["date"],
-            "source": source_name,
-            "file": filepath,
-            "crawled_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-        })
-        existing_urls.add(url)
-        return False
 
-    polite_sleep()
-    resp = fetch_with_retry(url)
-    if not resp:
-        return False
+# ================================================================
+# 断点（全量模式下各栏目已完成的最后一页）
+# ================================================================
+def _checkpoint_path(source: dict) -> str:
+    return os.path.join(CHECKPOINT_DIR, f"{source['dir_name']}.json")
+
+
+def load_checkpoint(source: dict) -> int:
+    """返回栏目上次已完成的最后一页，没有断点时返回 0"""
+    try:
+        with open(_checkpoint_path(source), "rb") as f:
+            return int(orjson.loads(f.read()).get("last_page", 0))
+    except (OSError, ValueError):
+        return 0
+
+
+def save_checkpoint(source: dict, page_num: int):
+    """记录栏目已完成的最后一页（先写临时文件再原子替换，中断时不会留下半个文件）"""
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    path = _checkpoint_path(source)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps({"source": source["name"], "last_page": page_num}))
+    os.replace(tmp, path)
+
 
-    with open(filepath, "w", encoding="utf-8") as f:
-        f.write(resp.text)
+def clear_checkpoint(source: dict):
+    """栏目爬取结束后删除断点，下次全量爬取从第1页开始"""
+    try:
+        os.remove(_checkpoint_path(source))
+    except FileNotFoundError:
+        pass
 
-    append_manifest({
-        "url": url,
+
+# ================================================================
+# 详情页抓取与保存
+# ================================================================
+def scan_existing_files(save_dir: str) -> set[str]:
+    """一次 scandir 得到目录中已有的非空文件名，代替逐条 exists + getsize"""
+    with os.scandir(save_dir) as it:
+        return {e.name for e in it if e.is_file() and e.stat().st_size > 0}
+
+
+def _record_download(item: dict, filepath: str, existing_urls: Seen, source_name: str):
+    """写入 manifest 并标记 URL 为已爬取"""
+    MANIFEST.append({
+        "url": item["url"],
         "title": item["title"],
         "date": item["date"],
         "source": source_name,
         "file": filepath,
         "crawled_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-    })
-    existing_urls.add(url)
-    return True
+    }, existing_urls)
 
 
-# ================================================================
-# 主爬取流程
-# ================================================================
-def crawl_static_source(source: dict, existing_urls: set, max_pages: int = None):
-    """爬取静态分页栏目（中央文件 / 其他部门文件）"""
-    name = source["name"]
-    base_url = source["base_url"]
-    save_dir = os.path.join(BASE_DATA_DIR, source["dir_name"])
-    os.makedirs(save_dir, exist_ok=True)
+def _existing_filepath(item: dict, save_dir: str, existing_urls: Seen, existing_files: set[str],
+                       source_name: str) -> str | None:
+    """
+    检查条目是否需要下载（调用方已滤掉已爬取的 URL，见 crawl_source）。
+    返回待写入的文件路径；文件已存在时补记 manifest 并返回 None。
+    """
+    filename = make_filename(item["date"], item["title"])
+    filepath = os.path.join(save_dir, filename)
 
-    logger.info(f"{'='*60}")
-    logger.info(f"开始爬取: {name}")
-    logger.info(f"{'='*60}")
+    # 如果文件已存在（断点续爬 — 文件存在但 manifest 丢失的情况）
+    # 也兼容旧版本保存的未压缩 .html 文件
+    for name in (filename, filename.removesuffix(".gz")):
+        if name in existing_files:
+            # 补充 manifest
+            _record_download(item, os.path.join(save_dir, name), existing_urls, source_name)
+            return None
+    return filepath
 
-    # 第1页
-    first_url = urljoin(base_url, "index.html")
-    resp = fetch_with_retry(first_url)
-    if not resp:
-        logger.error(f"无法访问 {name} 首页")
-        return
 
-    total_pages = get_total_pages_static(resp.text)
-    if max_pages:
-        total_pages = min(total_pages, max_pages)
-    logger.info(f"{name}: 共 {total_pages} 页")
+async def download_detail(session: aiohttp.ClientSession, item: dict, save_dir: str,
+                          existing_urls: Seen, source_name: str, existing_files: set[str]) -> bool:
+    """
+    下载单篇文档的详情页。
+    existing_files 为 save_dir 中已有的非空文件名集合（见 scan_existing_files），下载后会同步更新。
+    返回 True 表示新下载，False 表示跳过。
+    """
+    filepath = _existing_filepath(item, save_dir, existing_urls, existing_files, source_name)
+    if not filepath:
+        return False
 
-    stats = {"downloaded": 0, "skipped": 0, "failed": 0}
+    if not await fetch_to_file_async(session, item["url"], filepath):
+        return False
 
-    for page_num in range(1, total_pages + 1):
-        if page_num == 1:
-            page_url = urljoin(base_url, "index.html")
-            html = resp.text  # 复用第1页
-        else:
-            page_url = urljoin(base_url, f"index_{page_num - 1}.html")
-            polite_sleep(1, 3)
-            page_resp = fetch_with_retry(page_url, retries=1)  # 列表页只试1次
-            if not page_resp:
-                logger.warning(f"{name}: 第 {page_num} 页获取失败 (404?)，已到达末尾，停止爬取")
-                break  # 到达末尾，不再继续
-            html = page_resp.text
+    existing_files.add(os.path.basename(filepath))
+    _record_download(item, filepath, existing_urls, source_name)
+    return True
 
-        items = extract_items_from_static(html, page_url)
-        logger.info(f"{name}: 第 {page_num}/{total_pages} 页, 解析到 {len(items)} 条")
 
-        if not items:
-            logger.warning(f"{name}: 第 {page_num} 页无有效条目，停止爬取")
-            break
+async def download_items(session: aiohttp.ClientSession, items: list[dict], save_dir: str,
+                         existing_urls: Seen, source_name: str, existing_files: set[str], stats: dict) -> int:
+    """
+    并发下载一页中的新条目（items 不含已爬取的 URL），同时在途的请求数不超过 CONCURRENCY。
+    返回新下载的篇数。
+    """
+    sem = asyncio.Semaphore(CONCURRENCY)
+    # 同一页内重复的 URL 只下载一次，避免并发写同一文件
+    pending = list({item["url"]: item for item in items}.values())
+    stats["skipped"] += len(items) - len(pending)
+
+    # 不同 URL 可能生成同一文件名（同日期同标题 / 标题截断后相同）：每个文件名只并发下载一次，
+    # 其余条目等它完成后再依次处理，届时文件已存在，只补记 manifest（与顺序下载时一致）
+    first: list[dict] = []
+    deferred: list[dict] = []
+    claimed = set()
+    for item in pending:
+        filename = make_filename(item["date"], item["title"])
+        (deferred if filename in claimed else first).append(item)
+        claimed.add(filename)
+    pending = first + deferred
+
+    async def sem_download(item: dict) -> bool:
+        async with sem:
+            return await download_detail(session, item, save_dir, existing_urls, source_name, existing_files)
+
+    results = await asyncio.gather(*(sem_download(item) for item in first))
+    for item in deferred:
+        results.append(await download_detail(session, item, save_dir, existing_urls, source_name, existing_files))
+    page_new = 0
+    for item, is_new in zip(pending, results):
+        if is_new:
+            page_new += 1
+            logger.info(f"  ✓ 已下载: {item['date']} {item['title'][:40]}...")
+    stats["downloaded"] += page_new
+    stats["skipped"] += len(pending) - page_new
+    return page_new
 
-        for item in items:
-            is_new = download_detail(item, save_dir, existing_urls, name)
-            if is_new:
-                stats["downloaded"] += 1
-                logger.info(f"  ✓ 已下载: {item['date']} {item['title'][:40]}...")
-            else:
-                stats["skipped"] += 1
 
-    logger.info(f"{name} 完成: 下载 {stats['downloaded']}, 跳过 {stats['skipped']}, 失败 {stats['failed']}")
+# ================================================================
+# 主爬取流程
+# ================================================================
+async def iter_list_pages(session: aiohttp.ClientSession, pages: list[tuple[str, dict | None]],
+                          first_html: str, retries: int = MAX_RETRIES, start_page: int = 1):
+    """
+    从 start_page 起按页码顺序产出 (page_num, html)，抓取失败的页 html 为 None。
+    第1页复用已抓取的 first_html；总页数已知后其余页互不依赖，
+    按 LIST_BATCH 分批并发抓取，同时在途的请求数不超过 LIST_CONCURRENCY。
+    """
+    if start_page == 1:
+        yield 1, first_html
+        start_page = 2
+
+    sem = asyncio.Semaphore(LIST_CONCURRENCY)
+
+    async def fetch(url: str, params: dict | None) -> str | None:
+        async with sem:
+            return await fetch_with_retry_async(session, url, params=params, retries=retries)
 
+    for start in range(start_page - 1, len(pages), LIST_BATCH):
+        batch = pages[start:start + LIST_BATCH]
+        htmls = await asyncio.gather(*(fetch(url, params) for url, params in batch))
+        for offset, html in enumerate(htmls):
+            yield start + offset + 1, html
 
-def crawl_dynamic_source(source: dict, existing_urls: set, max_pages: int = None):
-    """爬取动态分页栏目（教育部文件）"""
+
+async def iter_pages_windowed(session: aiohttp.ClientSession, source: dict, retries: int = MAX_RETRIES):
+    """
+    总页数未知时（增量模式）从第1页起抓取列表页，按页码顺序产出 (page_num, html)。
+    每次并发抓取 INCREMENTAL_WINDOW 页；调用方提前停止时，最多多抓 INCREMENTAL_WINDOW - 1 页。
+    """
+    for start in itertools.count(1, INCREMENTAL_WINDOW):
+        page_nums = range(start, start + INCREMENTAL_WINDOW)
+        requests_ = [page_request(source, n) for n in page_nums]
+        htmls = await asyncio.gather(*(
+            fetch_with_retry_async(session, url, params=params, retries=retries) for url, params in requests_
+        ))
+        for page_num, html in zip(page_nums, htmls):
+            yield page_num, html
+
+
+def page_request(source: dict, page_num: int) -> tuple[str, dict | None]:
+    """返回栏目第 page_num 页列表的 (url, params)"""
+    if source["type"] == "static":
+        page_name = "index.html" if page_num == 1 else f"index_{page_num - 1}.html"
+        return urljoin(source["base_url"], page_name), None
+    params = dict(source.get("params", {}))
+    if page_num > 1:
+        params["page"] = page_num
+    return source["base_url"], params
+
+
+async def crawl_source(session: aiohttp.ClientSession, source: dict, existing_urls: Seen,
+                       mode: str = "full", max_pages: int | None = None):
+    """
+    爬取一个栏目。
+    mode="full"：先由第1页得到总页数，再分批并发抓取全部列表页。
+    mode="incremental"：从第1页起按窗口扫描直到没有更多页；动态栏目连续
+    FULL_PAGE_SKIP_LIMIT 整页全部为已有文件时提前停止（静态栏目页数少，始终全页扫描）。
+    """
     name = source["name"]
-    base_url = source["base_url"]
-    params_template = source.get("params", {})
+    is_static = source["type"] == "static"
+    incremental = mode == "incremental"
+    # 断点只用于不限页数的全量爬取；--test-mode 等限页运行不读写断点，避免覆盖真实进度
+    use_checkpoint = not incremental and not max_pages
     save_dir = os.path.join(BASE_DATA_DIR, source["dir_name"])
     os.makedirs(save_dir, exist_ok=True)
+    existing_files = scan_existing_files(save_dir)
 
     logger.info(f"{'='*60}")
-    logger.info(f"开始爬取: {name}")
+    logger.info(f"{'开始增量扫描' if incremental else '开始爬取'}: {name}")
     logger.info(f"{'='*60}")
 
-    # 第1页 — 获取总页数
-    params = params_template.copy()
-    resp = fetch_with_retry(base_url, params=params)
-    if not resp:
-        logger.error(f"无法访问 {name} 首页")
-        return
+    # 静态栏目的列表页只试1次（失败通常是 404，即已到末尾）
+    list_retries = 1 if is_static else MAX_RETRIES
+
+    if incremental:
+        page_label = "?"  # 增量模式不预先获取总页数
+        pages = iter_pages_windowed(session, source, retries=list_retries)
+    else:
+        # 第1页 — 获取总页数
+        first_url, first_params = page_request(source, 1)
+        first_html = await fetch_with_retry_async(session, first_url, params=first_params)
+        if first_html is None:
+            logger.error(f"无法访问 {name} 首页")
+            return
+
+        total_pages = get_total_pages(first_html, source["type"])
+        if max_pages:
+            total_pages = min(total_pages, max_pages)
+        page_label = str(total_pages)
+        logger.info(f"{name}: 共 {total_pages} 页")
+
+        # 断点续爬：从上次完成的页往前回退 CHECKPOINT_REWIND 页开始
+        last_page = load_checkpoint(source) if use_checkpoint else 0
+        start_page = max(1, min(last_page, total_pages) - CHECKPOINT_REWIND)
+        if last_page:
+            logger.info(f"{name}: 上次已完成第 {last_page} 页，从第 {start_page} 页继续")
+        page_requests = [page_request(source, n) for n in range(1, total_pages + 1)]
+        pages = iter_list_pages(session, page_requests, first_html, retries=list_retries, start_page=start_page)
+
+    # 到达末尾（或增量模式下获取失败）即停止；全量爬取动态栏目时跳过失败页继续
+    stop_on_missing = is_static or incremental
+    stats = {"downloaded": 0, "skipped": 0, "failed": 0}
+    consecutive_full_skip_pages = 0  # 连续整页全旧的页数
 
-    total_pages = get_total_pages_dynamic(resp.text)
-    if max_pages:
-        total_pages = min(total_pages, max_pages)
-    logger.info(f"{name}: 共 {total_pages} 页")
+    async for page_num, html in pages:
+        if html is None:
+            if stop_on_missing:
+                logger.warning(f"{name}: 第 {page_num} 页获取失败 (404?)，已到达末尾，停止爬取")
+                break
+            logger.error(f"{name}: 第 {page_num} 页获取失败，跳过")
+            stats["failed"] += 1
+            continue
 
-    stats = {"downloaded": 0, "skipped": 0, "failed": 0}
+        # 动态页面的相对链接以站点根目录为基准
+        join_base = page_request(source, page_num)[0] if is_static else DYNAMIC_JOIN_BASE
+        items = extract_items(html, join_base, existing_urls)
+        logger.info(f"{name}: 第 {page_num}/{page_label} 页, 解析到 {len(items)} 条")
 
-    for page_num in range(1, total_pages + 1):
-        if page_num == 1:
-            html = resp.text  # 复用第1页
-        else:
-            params = params_template.copy()
-            params["page"] = page_num
-            polite_sleep(1, 3)
-            page_resp = fetch_with_retry(base_url, params=params)
-            if not page_resp:
-                logger.error(f"{name}: 第 {page_num} 页获取失败，跳过")
-                stats["failed"] += 1
-                continue
-            html = page_resp.text
-
-        # 动态页面的 base_url 用于 urljoin（相对链接基准）
-        join_base = "http://www.moe.gov.cn/"
-        items = extract_items_from_dynamic(html, join_base)
-        logger.info(f"{name}: 第 {page_num}/{total_pages} 页, 解析到 {len(items)} 条")
-
-        for item in items:
-            is_new = download_detail(item, save_dir, existing_urls, name)
-            if is_new:
-                stats["downloaded"] += 1
-                logger.info(f"  ✓ 已下载: {item['date']} {item['title'][:40]}...")
-            else:
-                stats["skipped"] += 1
+        if not items and stop_on_missing:
+            logger.warning(f"{name}: 第 {page_num} 页无有效条目，停止爬取")
+            break
+
+        # extract_items 已把旧条目标记为 _seen：整页皆旧时不进入下载流程
+        new_items = [item for item in items if not item.get("_seen")]
+        stats["skipped"] += len(items) - len(new_items)
+        page_new = 0
+        if new_items:
+            page_new = await download_items(session, new_items, save_dir, existing_urls, name, existing_files, stats)
+        if use_checkpoint:
+            # 断点前移前先让本页的 manifest 与 state.db 落盘
+            MANIFEST.flush()
+            save_checkpoint(source, page_num)
 
         # 每50页输出一次汇总
         if page_num % 50 == 0:
-            logger.info(f"  >>> 进度: {page_num}/{total_pages} 页, 已下载 {stats['downloaded']}, 跳过 {stats['skipped']}")
+            logger.info(f"  >>> 进度: {page_num}/{page_label} 页, 已下载 {stats['downloaded']}, 跳过 {stats['skipped']}")
+
+        # 增量模式：判断整页是否全部为旧文件
+        if incremental and not is_static:
+            if page_new == 0:
+                consecutive_full_skip_pages += 1
+                if consecutive_full_skip_pages >= FULL_PAGE_SKIP_LIMIT:
+                    logger.info(f"⚡️ 连续 {FULL_PAGE_SKIP_LIMIT} 整页均为已存在文件，已追平历史进度。")
+                    logger.info(f"🛑 停止扫描: {name}")
+                    break
+            else:
+                consecutive_full_skip_pages = 0  # 有新文件，重置计数
 
+    MANIFEST.flush()
+    if use_checkpoint:
+        clear_checkpoint(source)
     logger.info(f"{name} 完成: 下载 {stats['downloaded']}, 跳过 {stats['skipped']}, 失败 {stats['failed']}")
 
 
+async def crawl_sources(sources: list[dict], existing_urls: Seen, mode: str = "full", max_pages: int | None = None):
+    """在同一个 aiohttp 会话中依次爬取各栏目"""
+    async with new_session() as session:
+        for source in sources:
+            try:
+                await crawl_source(session, source, existing_urls, mode, max_pages)
+            except Exception as e:
+                logger.error(f"模块 {source['name']} 出错: {e}", exc_info=True)
+
+
 # ================================================================
 # 入口
 # ================================================================
@@ -526,17 +735,11 @@ def main():
         "all": SOURCES,
     }
 
-    for source in module_map[args.module]:
-        try:
-            if source["type"] == "static":
-                crawl_static_source(source, existing_urls, max_pages)
-            elif source["type"] == "dynamic":
-                crawl_dynamic_source(source, existing_urls, max_pages)
-        except KeyboardInterrupt:
-            logger.warning("用户中断，已安全退出。已下载的文件不会丢失。")
-            sys.exit(0)
-        except Exception as e:
-            logger.error(f"模块 {source['name']} 出错: {e}", exc_info=True)
+    try:
+        asyncio.run(crawl_sources(module_map[args.module], existing_urls, max_pages=max_pages))
+    except KeyboardInterrupt:
+        logger.warning("用户中断，已安全退出。已下载的文件不会丢失。")
+        sys.exit(0)
 
     logger.info("全部爬取完成！")
 
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+list_parser.py - 列表页解析与文件命名（纯函数）
+从 crawler.py 中拆出的 CPU 热路径：不做网络与磁盘 I/O，类型注解完整，
+可以用 mypyc 预编译以减少解释器开销：
+
+    mypyc list_parser.py
+
+编译产物（.so）与源文件同目录时 Python 会优先导入它；删掉即回退到纯 Python 版本。
+"""
+
+import re
+import math
+from collections.abc import Container
+from functools import lru_cache
+from typing import Any
+from urllib.parse import urljoin
+from selectolax.lexbor import LexborHTMLParser
+
+# 预编译正则（列表页解析的热路径上会被反复调用）
+_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+_URL_DATE_RE = re.compile(r'/(\d{4})(\d{2})/')
+_RECORDCOUNT_RE = re.compile(r'var\s+recordCount\s*=\s*(\d+)')
+_PAGESIZE_RE = re.compile(r'var\s+pageSize\s*=\s*(\d+)')
+_PAGE_INFO_RE = re.compile(r'页数：\d+/(\d+)')
+_INDEX_HTML_RE = re.compile(r'index_(\d+)\.html')
+_PAGE_QS_RE = re.compile(r'page=(\d+)')
+_LAST_INDEX_HTML_RE = re.compile(r'href=["\'][^"\']*index_(\d+)\.html["\'][^>]*>\s*末页')
+_LAST_PAGE_QS_RE = re.compile(r'href=["\'][^"\']*page=(\d+)[^"\']*["\'][^>]*>\s*末页')
+_SANITIZE_RE = re.compile(r'[\\/:*?"<>|]')
+_WS_RE = re.compile(r'\s+')
+
+# 列表页条目过滤：页脚链接标题 / 详情页后缀
+_SKIP_TITLES = frozenset(("网站声明", "网站地图", "联系我们"))
+_HTML_SUFFIXES = (".html", ".htm")
+
+
+# ================================================================
+# 文件命名
+# ================================================================
+@lru_cache(maxsize=8192)
+def sanitize_filename(name: str, max_len: int = 80) -> str:
+    """清洗文件名：移除非法字符，截断过长名称"""
+    # 移除 Windows / macOS 非法字符
+    name = _SANITIZE_RE.sub('', name)
+    # 移除控制字符和多余空格
+    name = _WS_RE.sub(' ', name).strip()
+    # 移除首尾的点号（Windows 限制）
+    name = name.strip('.')
+    if len(name) > max_len:
+        name = name[:max_len].rstrip()
+    return name if name else "untitled"
+
+
+def make_filename(date_str: str, title: str) -> str:
+    """用日期+标题生成文件名（详情页以 gzip 压缩保存）"""
+    safe_title = sanitize_filename(title)
+    return f"{date_str}_{safe_title}.html.gz"
+
+
+# ================================================================
+# 列表页解析
+# ================================================================
+def _extract_pages_from_js(html: str) -> int | None:
+    """从页面 JavaScript 变量中提取总页数。
+    MOE 页面在 <script> 中有: var recordCount = 222; var pageSize = 20;
+    """
+    m_count = _RECORDCOUNT_RE.search(html)
+    m_size = _PAGESIZE_RE.search(html)
+    if m_count and m_size:
+        record_count = int(m_count.group(1))
+        page_size = int(m_size.group(1))
+        if page_size > 0:
+            return math.ceil(record_count / page_size)
+    return None
+
+
+def _find_last_page_link(tree: LexborHTMLParser) -> str:
+    """返回 "末页" 链接的 href，找不到时返回空字符串"""
+    for a in tree.css("a"):
+        if "末页" in a.text():
+            return a.attributes.get("href") or ""
+    return ""
+
+
+def get_total_pages(html: str, source_type: str) -> int:
+    """从列表页提取总页数，source_type 为 "static" 或 "dynamic"。优先解析 JS 变量。"""
+    # 方法1：从 JS 变量解析 (最可靠)
+    js_pages = _extract_pages_from_js(html)
+    if js_pages:
+        return js_pages
+
+    # 静态页 "末页" 链接为 index_{N-1}.html，动态页为 page=N
+    if source_type == "static":
+        last_re, href_re, offset = _LAST_INDEX_HTML_RE, _INDEX_HTML_RE, 1
+    else:
+        last_re, href_re, offset = _LAST_PAGE_QS_RE, _PAGE_QS_RE, 0
+
+    # 方法2：直接在原始 HTML 上匹配 "页数：x/N" 和 "末页" 链接，无需构建 DOM
+    m = _PAGE_INFO_RE.search(html)
+    if m:
+        return int(m.group(1))
+    m = last_re.search(html)
+    if m:
+        return int(m.group(1)) + offset
+
+    # 方法3：正则未命中（文字被标签拆开等）时才解析 DOM
+    tree = LexborHTMLParser(html)
+    m = _PAGE_INFO_RE.search(tree.text())
+    if m:
+        return int(m.group(1))
+    last_link = _find_last_page_link(tree)
+    if last_link:
+        m = href_re.search(last_link)
+        if m:
+            return int(m.group(1)) + offset
+    return 1
+
+
+def extract_items(html: str, base_url: str, seen: Container[str] | None = None) -> list[dict[str, Any]]:
+    """
+    从列表页（静态栏目 / 动态搜索页）提取文档条目 [{url, title, date}]。
+    传入 seen 时，已爬取的条目跳过日期解析，以 {"date": "", "_seen": True} 返回。
+    """
+    tree = LexborHTMLParser(html)
+    items: list[dict[str, Any]] = []
+
+    # 列表通常在 <ul> 里面，每个 <li> 包含 <a> 和 <span>(日期)
+    # 遍历全部 <li>：列表容器的选择器尚未在真实列表页上核实，
+    # 只匹配部分容器会静默丢条目；导航 / 页脚链接由下面的过滤条件排除
+    for li in tree.css("li"):
+        a = li.css_first("a")
+        if not a:
+            continue
+        href = a.attributes.get("href") or ""
+        if not href or href.startswith("javascript") or not href.endswith(_HTML_SUFFIXES):
+            continue
+
+        # 获取完整标题 — 优先用 title 属性
+        title = a.attributes.get("title") or a.text(strip=True)
+        if not title:
+            continue
+
+        # 过滤掉网站底部的 "网站声明"、"网站地图"等
+        if title in _SKIP_TITLES:
+            continue
+
+        full_url = urljoin(base_url, href)
+        if seen is not None and full_url in seen:
+            items.append({"url": full_url, "title": title, "date": "", "_seen": True})
+            continue
+
+        # 提取日期 — 通常在 <span> 中
+        date_str = ""
+        span = li.css_first("span")
+        if span:
+            date_text = span.text(strip=True)
+            m = _DATE_RE.search(date_text)
+            if m:
+                date_str = m.group(1)
+
+        # 如果 span 没找到日期，尝试从 li 的文本中搜索
+        if not date_str:
+            li_text = li.text()
+            m = _DATE_RE.search(li_text)
+            if m:
+                date_str = m.group(1)
+
+        # 如果还没有日期，尝试从 URL 中提取
+        if not date_str:
+            m = _URL_DATE_RE.search(full_url)
+            if m:
+                date_str = f"{m.group(1)}-{m.group(2)}-00"
+
+        items.append({
+            "url": full_url,
+            "title": title,
+            "date": date_str or "unknown-date",
+        })
+
+    return items
@@ -6,7 +6,7 @@ monitor.py - 爬虫进度实时监控
 """
 
 import os
-import json
+import re
 import time
 import sys
 from collections import defaultdict
@@ -15,6 +15,7 @@ from datetime import timedelta
 BASE_DATA_DIR = "data"
 MANIFEST_FILE = os.path.join(BASE_DATA_DIR, "manifest.jsonl")
 LOG_FILE = os.path.join("logs", "crawler.log")
+HTML_SUFFIXES = (".html", ".html.gz")
 
 # 各模块预估总数
 EXPECTED_TOTALS = {
@@ -25,34 +26,76 @@ EXPECTED_TOTALS = {
 
 REFRESH_INTERVAL = 3  # 秒
 
+# 进度条字符（预先生成，宽度不超过 BAR_MAX_WIDTH 时直接切片）
+BAR_MAX_WIDTH = 30
+_FULL = "█" * BAR_MAX_WIDTH
+_EMPTY = "░" * BAR_MAX_WIDTH
+
+# 读取日志尾部的初始窗口与上限（字节）
+LOG_TAIL_WINDOW = 8 * 1024
+LOG_TAIL_MAX_WINDOW = 64 * 1024
+
+# manifest 行中的 "source" 字段（crawler 写入的格式固定，无需完整 JSON 解析）
+_SRC_RE = re.compile(rb'"source"\s*:\s*"([^"]+)"')
+
+# manifest 统计结果缓存，键为文件的 (mtime_ns, size)
+_manifest_size_cache = {"key": None, "count": 0}
+_manifest_module_cache = {"key": None, "counts": {}}
+
+# 各模块目录的文件数缓存：module -> (目录 mtime_ns, 文件数)
+_module_file_cache = {}
+
 
 def count_files_by_module() -> dict:
     """统计各模块已下载的文件数"""
     counts = {}
     for module in EXPECTED_TOTALS:
         module_dir = os.path.join(BASE_DATA_DIR, module)
-        if os.path.isdir(module_dir):
-            files = [f for f in os.listdir(module_dir) if f.endswith(".html")]
-            counts[module] = len(files)
-        else:
+        try:
+            mtime_ns = os.stat(module_dir).st_mtime_ns
+        except OSError:
             counts[module] = 0
+            continue
+        # 新建/改名文件都会更新目录 mtime，未变化的目录直接用缓存
+        cached = _module_file_cache.get(module)
+        if cached and cached[0] == mtime_ns:
+            counts[module] = cached[1]
+            continue
+        with os.scandir(module_dir) as it:
+            n = sum(1 for e in it
+                    if e.name.endswith(HTML_SUFFIXES) and e.is_file(follow_symlinks=False))
+        _module_file_cache[module] = (mtime_ns, n)
+        counts[module] = n
     return counts
 
 
+def _manifest_key() -> tuple[int, int] | None:
+    """manifest 的 (mtime_ns, size)，文件未变化时据此跳过重新扫描"""
+    try:
+        st = os.stat(MANIFEST_FILE)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 def count_manifest_by_module() -> dict:
     """从 manifest 统计各模块记录数"""
-    counts = defaultdict(int)
-    if os.path.exists(MANIFEST_FILE):
-        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        record = json.loads(line)
-                        source = record.get("source", "unknown")
-                        counts[source] += 1
-                    except json.JSONDecodeError:
-                        pass
+    key = _manifest_key()
+    if key is None:
+        return {}
+    if key == _manifest_module_cache["key"]:
+        return dict(_manifest_module_cache["counts"])
+
+    # 只用正则取出 "source" 字段，不对整行做 JSON 解析
+    raw_counts = defaultdict(int)
+    with open(MANIFEST_FILE, "rb") as f:
+        for line in f:
+            if line.isspace():
+                continue
+            m = _SRC_RE.search(line)
+            raw_counts[m.group(1) if m else b"unknown"] += 1
+    counts = {source.decode("utf-8", errors="replace"): n for source, n in raw_counts.items()}
+    _manifest_module_cache.update(key=key, counts=counts)
     return dict(counts)
 
 
@@ -61,31 +104,52 @@ def get_last_log_lines(n: int = 5) -> list[str]:
     if not os.path.exists(LOG_FILE):
         return ["(日志文件尚未创建)"]
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            return [line.rstrip() for line in lines[-n:]]
+        with open(LOG_FILE, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            # 只读文件末尾一个窗口，行数不够时窗口翻倍，直到上限或读到文件头
+            window = LOG_TAIL_WINDOW
+            while True:
+                start = max(0, size - window)
+                f.seek(start)
+                lines = f.read().splitlines()
+                if start > 0:
+                    lines = lines[1:]  # 窗口首行可能不完整
+                if len(lines) >= n or start == 0 or window >= LOG_TAIL_MAX_WINDOW:
+                    break
+                window *= 2
+            return [line.decode("utf-8", errors="replace").rstrip() for line in lines[-n:]]
     except Exception:
         return ["(无法读取日志)"]
 
 
 def get_manifest_size() -> int:
-    """获取 manifest 文件行数"""
-    if not os.path.exists(MANIFEST_FILE):
+    """获取 manifest 文件行数（按 1 MiB 分块统计换行符，不逐行解码）"""
+    key = _manifest_key()
+    if key is None:
         return 0
+    if key == _manifest_size_cache["key"]:
+        return _manifest_size_cache["count"]
     try:
-        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
-            return sum(1 for _ in f)
+        n = 0
+        with open(MANIFEST_FILE, "rb") as f:
+            while chunk := f.read(1 << 20):
+                n += chunk.count(b"\n")
     except Exception:
         return 0
+    _manifest_size_cache.update(key=key, count=n)
+    return n
 
 
-def format_bar(current: int, total: int, width: int = 30) -> str:
+def format_bar(current: int, total: int, width: int = BAR_MAX_WIDTH) -> str:
     """生成进度条"""
     if total == 0:
         return "[" + "?" * width + "]"
     ratio = min(current / total, 1.0)
     filled = int(width * ratio)
-    bar = "█" * filled + "░" * (width - filled)
+    if width <= BAR_MAX_WIDTH:
+        bar = _FULL[:filled] + _EMPTY[:width - filled]
+    else:
+        bar = "█" * filled + "░" * (width - filled)
     pct = ratio * 100
     return f"[{bar}] {pct:5.1f}%"
 
@@ -103,7 +167,6 @@ def main():
 
     try:
         while True:
-            clear_screen()
             elapsed = time.time() - start_time
             elapsed_str = str(timedelta(seconds=int(elapsed)))
 
@@ -117,32 +180,45 @@ def main():
             remaining = total_expected - total_files
             eta = timedelta(seconds=int(remaining / speed)) if speed > 0 else "∞"
 
+            # 先拼出整帧，再一次性写出，避免逐行 print 各自刷新
+            frame = []
+
             # 头部
-            print("╔══════════════════════════════════════════════════════════════╗")
-            print("║           📊 教育部网站爬虫 — 实时进度监控                 ║")
-            print("╠══════════════════════════════════════════════════════════════╣")
-            print(f"║  ⏱  运行时间: {elapsed_str:<12}  📦 总文件: {total_files}/{total_expected:<10}  ║")
-            print(f"║  🚀 速度: {speed:.1f} 篇/秒         ⏳ 预计剩余: {str(eta):<12}   ║")
-            print("╠══════════════════════════════════════════════════════════════╣")
+            frame.append("╔══════════════════════════════════════════════════════════════╗")
+            frame.append("║           📊 教育部网站爬虫 — 实时进度监控                 ║")
+            frame.append("╠══════════════════════════════════════════════════════════════╣")
+            frame.append(f"║  ⏱  运行时间: {elapsed_str:<12}  📦 总文件: {total_files}/{total_expected:<10}  ║")
+            frame.append(f"║  🚀 速度: {speed:.1f} 篇/秒         ⏳ 预计剩余: {str(eta):<12}   ║")
+            frame.append("╠══════════════════════════════════════════════════════════════╣")
 
             # 各模块进度
             for module, expected in EXPECTED_TOTALS.items():
                 current = file_counts.get(module, 0)
                 bar = format_bar(current, expected, 25)
-                print(f"║  {module:<10} {bar} {current:>5}/{expected:<5}  ║")
+                frame.append(f"║  {module:<10} {bar} {current:>5}/{expected:<5}  ║")
 
-            print("╠══════════════════════════════════════════════════════════════╣")
-            print("║  📋 最近日志:                                              ║")
+            # manifest 记录数及各模块分布（顺序同上；文件未变化时直接用缓存，不重新扫描）
+            manifest_counts = count_manifest_by_module()
+            per_module = " / ".join(str(manifest_counts.get(m, 0)) for m in EXPECTED_TOTALS)
+            manifest_info = f"{get_manifest_size()}（各模块 {per_module}）"
+            frame.append(f"║  🧾 manifest 记录: {manifest_info:<41}║")
+
+            frame.append("╠══════════════════════════════════════════════════════════════╣")
+            frame.append("║  📋 最近日志:                                              ║")
 
             # 最近日志
             last_lines = get_last_log_lines(5)
             for line in last_lines:
                 # 截断过长的行
                 display = line[:58]
-                print(f"║  {display:<58}║")
+                frame.append(f"║  {display:<58}║")
+
+            frame.append("╚══════════════════════════════════════════════════════════════╝")
+            frame.append(f"\n  刷新间隔: {REFRESH_INTERVAL}s | Ctrl+C 退出监控 (不影响爬虫)")
 
-            print("╚══════════════════════════════════════════════════════════════╝")
-            print(f"\n  刷新间隔: {REFRESH_INTERVAL}s | Ctrl+C 退出监控 (不影响爬虫)")
+            clear_screen()
+            sys.stdout.write("\n".join(frame) + "\n")
+            sys.stdout.flush()
 
             time.sleep(REFRESH_INTERVAL)
 
@@ -7,14 +7,44 @@ parser.py - Stage 2: 离线解析器
 
 import os
 import re
+import gzip
 import logging
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import lxml.html
+from charset_normalizer import from_bytes
+from lxml import etree
 
 # --- 配置 ---
 BASE_DATA_DIR = "data"
 MODULES = ["中央文件", "教育部文件", "其他部门文件"]
 MARKDOWN_DIR = os.path.join(BASE_DATA_DIR, "markdown")
 LOG_DIR = "logs"
+HTML_SUFFIXES = (".html", ".html.gz")
+DETECT_ENCODINGS = ["utf_8", "gb18030", "gbk"]  # 编码探测的候选范围
+PARSE_WORKERS = os.cpu_count() or 1  # 解析是 CPU 密集型，按核数开进程
+PARSE_BATCH = 256  # 每批提交的文件数
+
+_WS_RE = re.compile(r"\s+")
+_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})_")  # 文件名的日期前缀
+_SKIP_TAGS = ("script", "style", "iframe")  # 正文中不输出的标签
+
+# 预编译的 XPath：遍历在 libxml2 中完成，按文档顺序返回节点
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+_H1_XP = etree.XPath("(//h1)[1]")
+_XXGK_TABLE_XP = etree.XPath("(//table[contains(concat(' ', normalize-space(@class), ' '), ' xxgk_table ')])[1]")
+_TD_XP = etree.XPath(".//td")
+_LI_XP = etree.XPath(".//li")
+# 正文区外不做清洗，元数据只取 script/style/iframe 之外的文本
+_META_TEXT_XP = etree.XPath(
+    ".//text()[not(" + " or ".join(f"ancestor::{tag}" for tag in _SKIP_TAGS) + ")]"
+)
+_BODY_XP = etree.XPath(".//p | .//h2 | .//h3 | .//h4 | .//ul | .//ol | .//table")
+# 正文区候选，按优先级排列
+_CONTENT_XPS = (
+    etree.XPath("(//div[contains(concat(' ', normalize-space(@class), ' '), ' trs_editor_view ')])[1]"),
+    etree.XPath("(//div[@id='jyb_xs_content'])[1]"),
+    etree.XPath("(//div[contains(concat(' ', normalize-space(@class), ' '), ' moe-detail-box ')])[1]"),
+)
 
 # --- 日志设置 ---
 os.makedirs(LOG_DIR, exist_ok=True)
@@ -32,47 +62,69 @@ logger = logging.getLogger(__name__)
 def clean_text(text: str) -> str:
     if not text:
         return ""
-    return re.sub(r"\s+", " ", text).strip()
+    return _WS_RE.sub(" ", text).strip()
+
+
+def html_stem(filename: str) -> str:
+    """去掉 .html / .html.gz 后缀"""
+    return os.path.splitext(filename.removesuffix(".gz"))[0]
+
+
+def _first(xpath: etree.XPath, root):
+    """返回 XPath 的第一个匹配节点，没有时返回 None"""
+    found = xpath(root)
+    return found[0] if found else None
+
+
+def _meta_text(element) -> str:
+    """元数据节点的文本（不含脚本、样式）"""
+    return clean_text("".join(_META_TEXT_XP(element)))
+
+
+def decode_content(content: bytes) -> bytes | None:
+    """把详情页转为 UTF-8 字节：页头声明 UTF-8 且校验通过时原样返回，否则交给 charset_normalizer 一次探测"""
+    if b"utf-8" in content[:1024].lower():
+        try:
+            content.decode("utf-8")
+            return content
+        except UnicodeDecodeError:
+            pass  # 声明与实际编码不符，走探测
+    best = from_bytes(content, cp_isolation=DETECT_ENCODINGS).best()
+    return best.output("utf_8") if best else None
 
 
 def parse_html(file_path: str) -> str | None:
     """解析单个 HTML 文件并返回 Markdown 内容"""
-    with open(file_path, "rb") as f:
+    # crawler 以 gzip 压缩保存详情页，旧版本为未压缩的 .html
+    opener = gzip.open if file_path.endswith(".gz") else open
+    with opener(file_path, "rb") as f:
         content = f.read()
 
-    # 尝试解码
-    for encoding in ("utf-8", "gb18030", "gbk", "latin-1"):
-        try:
-            html = content.decode(encoding)
-            break
-        except (UnicodeDecodeError, LookupError):
-            continue
-    else:
+    html = decode_content(content)
+    if html is None:
         logger.error(f"无法解码: {file_path}")
         return None
 
-    soup = BeautifulSoup(html, "html.parser")
+    root = lxml.html.document_fromstring(html, parser=_HTML_PARSER)
 
     # --- 提取元数据 ---
     meta = {}
 
     # 从文件名提取日期
-    basename = os.path.basename(file_path)
-    filename_no_ext = os.path.splitext(basename)[0]
-    date_match = re.match(r"(\d{4}-\d{2}-\d{2})_", filename_no_ext)
+    filename_no_ext = html_stem(os.path.basename(file_path))
+    date_match = _DATE_RE.match(filename_no_ext)
     if date_match:
         meta["date_from_filename"] = date_match.group(1)
 
     # 标题
-    h1 = soup.find("h1")
-    meta["title"] = clean_text(h1.get_text()) if h1 else "Untitled"
+    h1 = _first(_H1_XP, root)
+    meta["title"] = _meta_text(h1) if h1 is not None else "Untitled"
 
     # 提取信息公开表格
-    table = soup.find("table", class_="xxgk_table")
-    if table:
-        tds = table.find_all("td")
-        for idx, td in enumerate(tds):
-            text = clean_text(td.get_text())
+    table = _first(_XXGK_TABLE_XP, root)
+    if table is not None:
+        for idx, td in enumerate(_TD_XP(table)):
+            text = _meta_text(td)
             if idx == 0:
                 meta["index_no"] = text
             elif idx == 2:
@@ -83,19 +135,13 @@ def parse_html(file_path: str) -> str | None:
                 meta["doc_number"] = text
 
     # --- 提取正文 ---
-    content_div = (
-        soup.find("div", class_="trs_editor_view")
-        or soup.find("div", id="jyb_xs_content")
-        or soup.find("div", class_="moe-detail-box")
-    )
+    content_div = next((div for div in (_first(xp, root) for xp in _CONTENT_XPS) if div is not None), None)
 
-    if not content_div:
+    if content_div is None:
         logger.warning(f"未找到正文区: {file_path}")
         return None
-
-    # 清洗
-    for tag in content_div(["script", "style", "iframe"]):
-        tag.decompose()
+    # 清洗：只在正文区内去掉 script/style/iframe（保留标签后的尾随文本）
+    etree.strip_elements(content_div, *_SKIP_TAGS, with_tail=False)
 
     # 转换为 Markdown
     lines = []
@@ -115,22 +161,22 @@ def parse_html(file_path: str) -> str | None:
     lines.append("---")
     lines.append("")
 
-    for element in content_div.find_all(["p", "h2", "h3", "h4", "ul", "ol", "table"]):
-        if element.name in ("h2", "h3", "h4"):
-            level = "#" * (int(element.name[1]) - 1 + 1)
-            lines.append(f"{level} {clean_text(element.get_text())}")
-        elif element.name == "p":
-            text = clean_text(element.get_text())
+    for element in _BODY_XP(content_div):
+        tag = element.tag
+        if tag in ("h2", "h3", "h4"):
+            lines.append(f"{'#' * int(tag[1])} {clean_text(element.text_content())}")
+        elif tag == "p":
+            text = clean_text(element.text_content())
             if text:
                 lines.append(text)
                 lines.append("")
-        elif element.name == "ul":
-            for li in element.find_all("li"):
-                lines.append(f"- {clean_text(li.get_text())}")
+        elif tag == "ul":
+            for li in _LI_XP(element):
+                lines.append(f"- {clean_text(li.text_content())}")
             lines.append("")
-        elif element.name == "ol":
-            for i, li in enumerate(element.find_all("li"), 1):
-                lines.append(f"{i}. {clean_text(li.get_text())}")
+        elif tag == "ol":
+            for i, li in enumerate(_LI_XP(element), 1):
+                lines.append(f"{i}. {clean_text(li.text_content())}")
             lines.append("")
 
     return "\n".join(lines)
@@ -140,41 +186,53 @@ def main():
     total_parsed = 0
     total_skipped = 0
 
-    for module in MODULES:
-        src_dir = os.path.join(BASE_DATA_DIR, module)
-        dst_dir = os.path.join(MARKDOWN_DIR, module)
-
-        if not os.path.isdir(src_dir):
-            logger.info(f"跳过模块（目录不存在）: {module}")
-            continue
+    with ProcessPoolExecutor(max_workers=PARSE_WORKERS) as pool:
+        for module in MODULES:
+            src_dir = os.path.join(BASE_DATA_DIR, module)
+            dst_dir = os.path.join(MARKDOWN_DIR, module)
 
-        os.makedirs(dst_dir, exist_ok=True)
-        files = [f for f in os.listdir(src_dir) if f.endswith(".html")]
-        logger.info(f"模块 [{module}]: 找到 {len(files)} 个 HTML 文件")
+            if not os.path.isdir(src_dir):
+                logger.info(f"跳过模块（目录不存在）: {module}")
+                continue
 
-        for filename in files:
-            file_path = os.path.join(src_dir, filename)
-            md_filename = os.path.splitext(filename)[0] + ".md"
-            md_path = os.path.join(dst_dir, md_filename)
+            os.makedirs(dst_dir, exist_ok=True)
+            files = [f for f in os.listdir(src_dir) if f.endswith(HTML_SUFFIXES)]
+            logger.info(f"模块 [{module}]: 找到 {len(files)} 个 HTML 文件")
 
-            # 跳过已解析的
-            if os.path.exists(md_path):
-                total_skipped += 1
-                continue
+            # 一次扫描目标目录得到已解析的文件名，代替逐个 exists
+            with os.scandir(dst_dir) as it:
+                done = {e.name for e in it if e.name.endswith(".md")}
 
-            try:
-                markdown_content = parse_html(file_path)
-                if markdown_content:
-                    with open(md_path, "w", encoding="utf-8") as f:
-                        f.write(markdown_content)
-                    total_parsed += 1
-                    logger.info(f"  ✓ 解析: {filename}")
-                else:
+            # 已解析的在主进程直接跳过，不提交给子进程
+            pending = []
+            for filename in files:
+                md_filename = html_stem(filename) + ".md"
+                if md_filename in done:
                     total_skipped += 1
-                    logger.warning(f"  ✗ 跳过: {filename}")
-            except Exception as e:
-                total_skipped += 1
-                logger.error(f"  ✗ 出错: {filename}: {e}")
+                    continue
+                pending.append((filename, os.path.join(src_dir, filename), os.path.join(dst_dir, md_filename)))
+
+            # 分批提交，避免一次性堆积上万个 future
+            for start in range(0, len(pending), PARSE_BATCH):
+                futures = {
+                    pool.submit(parse_html, file_path): (filename, md_path)
+                    for filename, file_path, md_path in pending[start:start + PARSE_BATCH]
+                }
+                for future in as_completed(futures):
+                    filename, md_path = futures[future]
+                    try:
+                        markdown_content = future.result()
+                        if markdown_content:
+                            with open(md_path, "w", encoding="utf-8") as f:
+                                f.write(markdown_content)
+                            total_parsed += 1
+                            logger.info(f"  ✓ 解析: {filename}")
+                        else:
+                            total_skipped += 1
+                            logger.warning(f"  ✗ 跳过: {filename}")
+                    except Exception as e:
+                        total_skipped += 1
+                        logger.error(f"  ✗ 出错: {filename}: {e}")
 
     logger.info(f"解析完成: 成功 {total_parsed}, 跳过 {total_skipped}")
 
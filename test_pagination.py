@@ -11,7 +11,15 @@ import requests
 import time
 import random
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
+from urllib3.util.retry import Retry
+
+try:
+    import lxml  # noqa: F401
+    _PARSER = 'lxml'
+except ImportError:
+    _PARSER = 'html.parser'
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -37,16 +45,28 @@ SOURCES = [
     }
 ]
 
-def fetch_url(url, params=None):
+def make_session():
+    """所有请求共用一个会话，复用 keep-alive 连接"""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=Retry(total=3, backoff_factor=0.5))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_url(session, url, params=None):
     try:
-        resp = requests.get(url, params=params, headers=HEADERS, timeout=30)
-        resp.encoding = resp.apparent_encoding if resp.apparent_encoding else 'utf-8'
+        resp = session.get(url, params=params, timeout=30)
+        # 用响应头声明的编码；未声明时 requests 默认为 ISO-8859-1，MOE 页面实际为 UTF-8
+        # （不用 apparent_encoding，它会对整个响应体做一次纯 Python 的编码探测）
+        if not resp.encoding or resp.encoding.lower() == 'iso-8859-1':
+            resp.encoding = 'utf-8'
         return resp
     except Exception as e:
         print(f"[ERROR] 请求失败 {url}: {e}")
         return None
 
-def test_source(source):
+def test_source(session, source):
     print(f"\n>>> 测试栏目: {source['name']}")
     
     # --- 第 1 页 ---
@@ -55,13 +75,13 @@ def test_source(source):
         url1 = urljoin(source['base_url'], "index.html")
         
     print(f"    [1] 请求第1页: {url1}")
-    resp1 = fetch_url(url1, params=source.get('params'))
+    resp1 = fetch_url(session, url1, params=source.get('params'))
     if not resp1 or resp1.status_code != 200:
         print("    [FAIL] 无法访问第1页")
         return
 
     # 解析链接数
-    soup1 = BeautifulSoup(resp1.text, 'html.parser')
+    soup1 = BeautifulSoup(resp1.text, _PARSER)
     # 兼容两种列表结构: div.gongkai_wenjian (dynamic) 和 (static 页面可能不同，需检查)
     # Static页面的列表通常在 ul#list 或 similar，先用通用查找 verify
     # 观察 static 页面结构: 通常是 <ul> <li> <a href="./...">...
@@ -87,14 +107,14 @@ def test_source(source):
         url2 = urljoin(source['base_url'], "index_1.html")
         
     print(f"    [2] 请求第2页: {url2} (Params: {params2})")
-    resp2 = fetch_url(url2, params=params2)
+    resp2 = fetch_url(session, url2, params=params2)
     
     if not resp2 or resp2.status_code != 200:
         print(f"    [FAIL] 无法访问第2页 (Status: {resp2.status_code if resp2 else 'Err'})")
         # 尝试 index_2.html 也就是 page 3? 或者是 index_1.html 确实不存在?
         return
 
-    soup2 = BeautifulSoup(resp2.text, 'html.parser')
+    soup2 = BeautifulSoup(resp2.text, _PARSER)
     items2 = soup2.select('div.gongkai_wenjian li, ul#list li, div.scy_lbsj-right li, li')
     valid_links2 = [i for i in items2 if i.find('a') and i.find('a').get('href')]
     print(f"    解析到条目数: {len(valid_links2)}")
@@ -108,9 +128,10 @@ def main():
     print("="*60)
     print("全量分页测试开始")
     print("="*60)
-    for source in SOURCES:
-        test_source(source)
-        time.sleep(2)
+    with make_session() as session:
+        for source in SOURCES:
+            test_source(session, source)
+            time.sleep(2)
 
 if __name__ == "__main__":
     main()